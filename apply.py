@@ -10,17 +10,8 @@ import subprocess
 import sys
 import tempfile
 
-FILE_BLOCK_PATTERN = re.compile(
-    r'^={5}\s*FILE:\s*(.+?)\s*={5}\s*\n'
-    r'(.*?)'
-    r'^={5}\s*END FILE:\s*(.+?)\s*={5}',
-    re.MULTILINE | re.DOTALL
-)
-
-CODE_FENCE_PATTERN = re.compile(
-    r'^```\w*\n(.*?)^```\s*$',
-    re.MULTILINE | re.DOTALL
-)
+MARKER = "====="
+FENCE = "```"
 
 FALLBACK_PATTERN = re.compile(
     r'`([^`\n]+\.\w+)`\s*\n'
@@ -30,9 +21,17 @@ FALLBACK_PATTERN = re.compile(
     re.DOTALL
 )
 
+HUNK_HEADER_PATTERN = re.compile(r'^@@ -(\d+)(,\d+)? \+(\d+)(,\d+)? @@')
+
+DIFF_CONTEXT = 3
+
+COMPARE_CHUNK_SIZE = 64 * 1024
+
 RED, GREEN, YELLOW, CYAN = "\033[91m", "\033[92m", "\033[93m", "\033[96m"
 BOLD, RESET = "\033[1m", "\033[0m"
 
+DIFF_COLORS = {"+": GREEN, "-": RED, "@": CYAN}
+
 
 def colored(text, color):
     if hasattr(sys.stderr, "isatty") and sys.stderr.isatty():
@@ -55,22 +54,103 @@ def read_clipboard():
         return None
 
 
+def find_line_start(text, sub, start, end=None):
+    i = text.find(sub, start, end)
+    while i > 0 and text[i - 1] != "\n":
+        i = text.find(sub, i + 1, end)
+    return i
+
+
+def line_end(text, pos, end=None):
+    eol = text.find("\n", pos, end)
+    if eol == -1:
+        return len(text) if end is None else end
+    return eol
+
+
+def parse_open_marker(text, pos):
+    eol = line_end(text, pos)
+    rest = text[pos + len(MARKER):eol].strip()
+    if not rest.startswith("FILE:") or not rest.endswith(MARKER):
+        return None
+    path = rest[len("FILE:"):-len(MARKER)].strip()
+    if not path:
+        return None
+    return path, eol
+
+
+def parse_close_marker(text, pos):
+    eol = line_end(text, pos)
+    rest = text[pos + len(MARKER):eol].lstrip()
+    if not rest.startswith("END FILE:"):
+        return None
+    rest = rest[len("END FILE:"):].lstrip()
+    i = rest.find(MARKER, 1)
+    if i == -1:
+        return None
+    return rest[:i].strip(), eol
+
+
+def find_fenced_content(text, start, end):
+    i = find_line_start(text, FENCE, start, end)
+    while i != -1:
+        j = i + len(FENCE)
+        while j < end and (text[j].isalnum() or text[j] == "_"):
+            j += 1
+        if j < end and text[j] == "\n":
+            break
+        i = find_line_start(text, FENCE, i + 1, end)
+    else:
+        return None
+
+    content_start = j + 1
+    i = find_line_start(text, FENCE, content_start, end)
+    while i != -1:
+        if not text[i + len(FENCE):line_end(text, i, end)].strip():
+            return text[content_start:i]
+        i = find_line_start(text, FENCE, i + 1, end)
+    return None
+
+
 def parse_file_blocks(text):
     blocks = []
-
-    for match in FILE_BLOCK_PATTERN.finditer(text):
-        open_path = match.group(1).strip()
-        content = match.group(2)
-        close_path = match.group(3).strip()
+    n = len(text)
+    pos = 0
+
+    while True:
+        start = find_line_start(text, MARKER, pos)
+        if start == -1:
+            break
+        opened = parse_open_marker(text, start)
+        if opened is None:
+            pos = start + 1
+            continue
+        open_path, eol = opened
+
+        body_start = eol + 1
+        j = eol
+        while j < n and text[j].isspace():
+            if text[j] == "\n":
+                body_start = j + 1
+            j += 1
+
+        end = find_line_start(text, MARKER, body_start)
+        while end != -1:
+            closed = parse_close_marker(text, end)
+            if closed is not None:
+                break
+            end = find_line_start(text, MARKER, end + 1)
+        else:
+            break
+        close_path, pos = closed
 
         if open_path != close_path:
             print(colored(f"  Warning: mismatched markers: '{open_path}' vs '{close_path}', skipping", YELLOW), file=sys.stderr)
             continue
 
-        fence_match = CODE_FENCE_PATTERN.search(content)
-        if fence_match:
-            content = fence_match.group(1)
-        else:
+        content = find_fenced_content(text, body_start, end)
+        if content is None:
+            content = text[body_start:end]
             if content.startswith("\n"):
                 content = content[1:]
 
@@ -92,51 +172,98 @@ def parse_file_blocks(text):
     return blocks
 
 
-def validate_path(rel_path, project_root):
+def validate_path(rel_path, abs_root, abs_root_sep):
     if os.path.isabs(rel_path):
         print(colored(f"  Rejected '{rel_path}': absolute path", RED), file=sys.stderr)
         return None
 
     normalized = os.path.normpath(rel_path)
-    if normalized.startswith(".."):
+    if normalized == ".." or normalized.startswith(".." + os.sep):
         print(colored(f"  Rejected '{rel_path}': path traversal", RED), file=sys.stderr)
         return None
 
-    full_path = os.path.abspath(os.path.join(project_root, normalized))
-    abs_root = os.path.abspath(project_root)
-    if not full_path.startswith(abs_root + os.sep) and full_path != abs_root:
+    full_path = os.path.normpath(os.path.join(abs_root, normalized))
+    if not full_path.startswith(abs_root_sep) and full_path != abs_root:
         print(colored(f"  Rejected '{rel_path}': outside project root", RED), file=sys.stderr)
         return None
 
     return full_path
 
 
+def file_matches(filepath, data):
+    try:
+        if os.path.getsize(filepath) != len(data):
+            return False
+        view = memoryview(data)
+        pos = 0
+        with open(filepath, "rb") as f:
+            while pos < len(data):
+                chunk = f.read(COMPARE_CHUNK_SIZE)
+                if not chunk or view[pos:pos + len(chunk)] != chunk:
+                    return False
+                pos += len(chunk)
+    except OSError:
+        return False
+    return True
+
+
 def compute_diff(rel_path, old, new):
-    return list(difflib.unified_diff(
-        old.splitlines(keepends=True), new.splitlines(keepends=True),
-        fromfile=f"a/{rel_path}", tofile=f"b/{rel_path}",
-    ))
+    old_lines = old.splitlines(keepends=True)
+    new_lines = new.splitlines(keepends=True)
+
+    # Only the changed middle goes through SequenceMatcher; the common
+    # prefix/suffix is trimmed down to a margin of context lines. Changes
+    # among repeated lines may align differently from a full-file diff,
+    # which can shift hunks and the +/- counts, but the diff stays valid.
+    limit = min(len(old_lines), len(new_lines))
+    prefix = 0
+    while prefix < limit and old_lines[prefix] == new_lines[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and old_lines[-1 - suffix] == new_lines[-1 - suffix]:
+        suffix += 1
+
+    margin = DIFF_CONTEXT
+    while True:
+        start = max(prefix - margin, 0)
+        trim = max(suffix - margin, 0)
+        diff = list(difflib.unified_diff(
+            old_lines[start:len(old_lines) - trim], new_lines[start:len(new_lines) - trim],
+            fromfile=f"a/{rel_path}", tofile=f"b/{rel_path}", n=DIFF_CONTEXT,
+        ))
+        # A change next to identical lines can be aligned into the margin,
+        # cutting its context short; widen the margin until it fits.
+        body = diff[3:]
+        leading = next((i for i, line in enumerate(body) if line[:1] != " "), len(body))
+        trailing = next((i for i, line in enumerate(reversed(body)) if line[:1] != " "), len(body))
+        if (not start or leading >= DIFF_CONTEXT) and (not trim or trailing >= DIFF_CONTEXT):
+            break
+        margin *= 2
+
+    if start:
+        for i, line in enumerate(diff):
+            m = HUNK_HEADER_PATTERN.match(line)
+            if m:
+                diff[i] = (f"@@ -{int(m.group(1)) + start}{m.group(2) or ''}"
+                           f" +{int(m.group(3)) + start}{m.group(4) or ''} @@{line[m.end():]}")
+    return diff
 
 
 def colorize_diff(lines):
     out = []
     for line in lines:
-        if line.startswith("+++") or line.startswith("---"):
+        head = line[:3]
+        if head == "+++" or head == "---":
             out.append(colored(line, BOLD))
-        elif line.startswith("+"):
-            out.append(colored(line, GREEN))
-        elif line.startswith("-"):
-            out.append(colored(line, RED))
-        elif line.startswith("@@"):
-            out.append(colored(line, CYAN))
-        else:
-            out.append(line)
+            continue
+        color = DIFF_COLORS.get(line[:1])
+        out.append(colored(line, color) if color else line)
     return out
 
 
 def count_changes(diff_lines):
-    added = sum(1 for l in diff_lines if l.startswith("+") and not l.startswith("+++"))
-    removed = sum(1 for l in diff_lines if l.startswith("-") and not l.startswith("---"))
+    added = sum(1 for l in diff_lines if l[:1] == "+" and l[:3] != "+++")
+    removed = sum(1 for l in diff_lines if l[:1] == "-" and l[:3] != "---")
     return added, removed
 
 
@@ -171,6 +298,7 @@ def main():
         sys.exit(1)
 
     abs_root = os.path.abspath(args.project_dir)
+    abs_root_sep = os.path.join(abs_root, "")
 
     if args.from_file:
         try:
@@ -193,11 +321,14 @@ def main():
 
     changes = []
     for rel_path, new_content in blocks:
-        full_path = validate_path(rel_path, abs_root)
+        full_path = validate_path(rel_path, abs_root, abs_root_sep)
         if full_path is None:
             continue
 
         if os.path.exists(full_path):
+            if file_matches(full_path, new_content.encode("utf-8")):
+                changes.append((rel_path, "unchanged", [], new_content, full_path))
+                continue
             with open(full_path, "r", encoding="utf-8", errors="replace") as f:
                 old_content = f.read()
             if old_content == new_content:
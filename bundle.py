@@ -2,17 +2,20 @@
 """Bundle a project directory."""
 
 import argparse
+import itertools
 import os
 import platform
 import subprocess
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 
-EXCLUDED_DIRS = {
+EXCLUDED_DIRS = frozenset({
     ".git", "__pycache__", ".venv", "venv", "env",
     "node_modules", ".mypy_cache", ".pytest_cache",
     ".tox", ".eggs", "dist", "build", ".idea", ".vscode",
     ".claude", ".ruff_cache",
-}
+})
 
 # INCLUDED_EXTENSIONS = {
 #     ".py", ".js", ".ts", ".tsx", ".jsx", ".html", ".css", ".scss",
@@ -27,12 +30,14 @@ EXCLUDED_DIRS = {
 #     ".env.example", ".gitignore", ".dockerignore",
 # }
 
-INCLUDED_EXTENSIONS = {
+INCLUDED_EXTENSIONS = frozenset({
     ".py"
-}
+})
 
 MAX_FILE_SIZE = 100 * 1024
 
+INDENTS = tuple("  " * i for i in range(64))
+
 HEADER_TEMPLATE = """\
 ===== PROJECT BUNDLE =====
 Project: {project_name}
@@ -52,65 +57,97 @@ Only include files you have changed. Do not include unchanged files.
 ===== END INSTRUCTIONS =====
 """
 
-
-def is_binary(filepath):
-    try:
-        with open(filepath, "rb") as f:
-            return b"\x00" in f.read(8192)
-    except OSError:
-        return True
+FILE_OPEN_TEMPLATE = "\n===== FILE: {} =====\n"
+FILE_CLOSE_TEMPLATE = "===== END FILE: {} ====="
 
 
 def should_include(filename, ext, config):
-    allowed = config.get("include_extensions", INCLUDED_EXTENSIONS)
-    if ext and ext in allowed:
-        return None
-    if filename in allowed:
+    allowed = config["include_extensions"]
+    if (ext and ext in allowed) or filename in allowed:
         return None
     return "extension not included"
 
 
-def collect_files(root, config):
-    root = os.path.abspath(root)
-    files, skipped = [], []
-    max_size = config.get("max_file_size", MAX_FILE_SIZE)
-    extra_exclude = set(config.get("exclude_dirs", []))
+def read_file(filepath, max_size):
+    try:
+        with open(filepath, "rb") as f:
+            data = f.read(max_size + 1)
+    except OSError:
+        return None, "unreadable"
 
-    for dirpath, dirnames, filenames in os.walk(root):
-        dirnames[:] = sorted(
-            d for d in dirnames
-            if d not in EXCLUDED_DIRS and d not in extra_exclude
-        )
+    if len(data) > max_size:
+        return None, f"exceeds {max_size // 1024} KB"
 
-        for filename in sorted(filenames):
-            filepath = os.path.join(dirpath, filename)
-            rel_path = os.path.relpath(filepath, root)
-            ext = os.path.splitext(filename)[1].lower()
+    if b"\x00" in data[:8192]:
+        return None, "binary"
+
+    try:
+        data.decode("utf-8")
+    except UnicodeDecodeError:
+        data = data.decode("utf-8", "replace").encode("utf-8")
+    if b"\r" in data:
+        data = data.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+    return data, None
 
-            reason = should_include(filename, ext, config)
-            if reason:
-                skipped.append((rel_path, reason))
-                continue
 
-            try:
-                size = os.path.getsize(filepath)
-            except OSError:
-                skipped.append((rel_path, "unreadable"))
-                continue
+def scan_files(path, rel_dir, excluded):
+    try:
+        with os.scandir(path) as it:
+            entries = sorted(it, key=lambda e: e.name)
+    except OSError:
+        return
 
-            if size > max_size:
-                skipped.append((rel_path, f"exceeds {max_size // 1024} KB"))
-                continue
+    subdirs = []
+    for entry in entries:
+        try:
+            is_dir = entry.is_dir()
+        except OSError:
+            is_dir = False
+        if not is_dir:
+            yield entry, rel_dir + entry.name
+        elif entry.name not in excluded and not entry.is_symlink():
+            subdirs.append(entry)
 
-            if is_binary(filepath):
-                skipped.append((rel_path, "binary"))
-                continue
+    for entry in subdirs:
+        yield from scan_files(entry.path, rel_dir + entry.name + os.sep, excluded)
 
-            try:
-                with open(filepath, "r", encoding="utf-8", errors="replace") as f:
-                    files.append((rel_path, f.read()))
-            except OSError:
-                skipped.append((rel_path, "read error"))
+
+def collect_files(root, config):
+    root = os.path.abspath(root)
+    files, skipped, candidates = [], [], []
+    max_size = config.get("max_file_size", MAX_FILE_SIZE)
+    excluded = EXCLUDED_DIRS | frozenset(config.get("exclude_dirs", []))
+
+    for entry, rel_path in scan_files(root, "", excluded):
+        filename = entry.name
+        head, dot, tail = filename.rpartition(".")
+        ext = f".{tail.lower()}" if dot and head.lstrip(".") else ""
+
+        reason = should_include(filename, ext, config)
+        if reason:
+            skipped.append((rel_path, reason))
+            continue
+
+        try:
+            size = entry.stat().st_size
+        except OSError:
+            skipped.append((rel_path, "unreadable"))
+            continue
+
+        if size > max_size:
+            skipped.append((rel_path, f"exceeds {max_size // 1024} KB"))
+            continue
+
+        candidates.append((rel_path, entry.path))
+
+    workers = min(32, (os.cpu_count() or 1) * 4)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(read_file, [fp for _, fp in candidates], itertools.repeat(max_size))
+        for (rel_path, _), (data, reason) in zip(candidates, results):
+            if reason:
+                skipped.append((rel_path, reason))
+            else:
+                files.append((rel_path, data))
 
     return files, skipped
 
@@ -118,9 +155,13 @@ def collect_files(root, config):
 def build_tree(files):
     lines = []
     prev_parts = []
+    sep = os.sep
+    indents = INDENTS
 
     for rel_path, _ in files:
-        parts = rel_path.split(os.sep)
+        parts = rel_path.split(sep)
+        if len(parts) > len(indents):
+            indents = tuple("  " * i for i in range(len(parts)))
         common = 0
         for i in range(min(len(prev_parts), len(parts) - 1)):
             if prev_parts[i] == parts[i]:
@@ -129,8 +170,8 @@ def build_tree(files):
                 break
 
         for i in range(common, len(parts) - 1):
-            lines.append(f"{'  ' * i}{parts[i]}/")
-        lines.append(f"{'  ' * (len(parts) - 1)}{parts[-1]}")
+            lines.append(f"{indents[i]}{parts[i]}/")
+        lines.append(f"{indents[len(parts) - 1]}{parts[-1]}")
         prev_parts = parts
 
     return "\n".join(lines)
@@ -144,45 +185,59 @@ def human_size(n):
     return f"{n / (1024 * 1024):.1f} MB"
 
 
-def build_bundle(root, files):
+@lru_cache(maxsize=32)
+def code_fences(ext):
+    return f"```{ext}\n".encode("utf-8"), b"```\n"
+
+
+def iter_bundle(root, files):
     name = os.path.basename(os.path.abspath(root))
-    total = sum(len(c.encode("utf-8")) for _, c in files)
+    total = sum(len(c) for _, c in files)
 
-    parts = [
-        HEADER_TEMPLATE.format(project_name=name, file_count=len(files), total_size=human_size(total)),
-        "===== TREE =====",
-        build_tree(files),
-        "===== END TREE =====\n",
-    ]
+    yield HEADER_TEMPLATE.format(project_name=name, file_count=len(files), total_size=human_size(total)).encode("utf-8")
+    yield b"\n===== TREE =====\n"
+    yield build_tree(files).encode("utf-8")
+    yield b"\n===== END TREE =====\n"
 
+    file_open = FILE_OPEN_TEMPLATE.format
+    file_close = FILE_CLOSE_TEMPLATE.format
     for rel_path, content in files:
-        ext = os.path.splitext(rel_path)[1].lstrip(".")
-        if not content.endswith("\n"):
-            content += "\n"
-        parts.append(
-            f"===== FILE: {rel_path} =====\n"
-            f"```{ext}\n"
-            f"{content}"
-            f"```\n"
-            f"===== END FILE: {rel_path} ====="
-        )
-
-    return "\n".join(parts)
+        fence_open, fence_close = code_fences(os.path.splitext(rel_path)[1].lstrip("."))
+        close = fence_close + file_close(rel_path).encode("utf-8")
+        if not content.endswith(b"\n"):
+            close = b"\n" + close
+        yield file_open(rel_path).encode("utf-8")
+        yield fence_open
+        yield content
+        yield close
 
 
-def copy_to_clipboard(text):
+def copy_to_clipboard(chunks):
     system = platform.system()
     if system == "Darwin":
         cmd = ["pbcopy"]
     elif system == "Windows":
         cmd = ["clip"]
     else:
-        return False
+        return None
+    try:
+        proc = subprocess.Popen(cmd, stdin=subprocess.PIPE)
+    except FileNotFoundError:
+        return None
+    size = 0
     try:
-        subprocess.run(cmd, input=text.encode("utf-8"), check=True)
-        return True
-    except (subprocess.CalledProcessError, FileNotFoundError):
-        return False
+        for chunk in chunks:
+            size += proc.stdin.write(chunk)
+        proc.stdin.close()
+    except BrokenPipeError:
+        size = None
+        try:
+            proc.stdin.close()
+        except BrokenPipeError:
+            pass
+    if proc.wait() != 0:
+        return None
+    return size
 
 
 def main():
@@ -206,7 +261,7 @@ def main():
         print(f"Error: '{args.project_dir}' is not a directory.", file=sys.stderr)
         sys.exit(1)
 
-    included = INCLUDED_EXTENSIONS | set(args.include_ext)
+    included = INCLUDED_EXTENSIONS | frozenset(args.include_ext)
     config = {
         "max_file_size": args.max_file_size * 1024,
         "exclude_dirs": args.exclude_dir,
@@ -218,22 +273,27 @@ def main():
         print("No files found to bundle.", file=sys.stderr)
         sys.exit(1)
 
-    bundle = build_bundle(args.project_dir, files)
-    bundle_size = len(bundle.encode("utf-8"))
+    chunks = iter_bundle(args.project_dir, files)
+    bundle_size = 0
     proj_name = os.path.basename(os.path.abspath(args.project_dir))
 
     if args.stdout:
-        print(bundle)
+        out = sys.stdout.buffer
+        for chunk in chunks:
+            bundle_size += out.write(chunk)
+        out.write(b"\n")
+        out.flush()
     elif args.clipboard:
-        if copy_to_clipboard(bundle):
-            print("Copied to clipboard.", file=sys.stderr)
-        else:
+        bundle_size = copy_to_clipboard(chunks)
+        if bundle_size is None:
             print("Failed to copy to clipboard.", file=sys.stderr)
             sys.exit(1)
+        print("Copied to clipboard.", file=sys.stderr)
     else:
         out_path = args.output or f"{proj_name}_bundle.txt"
-        with open(out_path, "w", encoding="utf-8") as f:
-            f.write(bundle)
+        with open(out_path, "wb") as f:
+            for chunk in chunks:
+                bundle_size += f.write(chunk)
         print(f"Wrote {out_path}", file=sys.stderr)
 
     print(f"\nBundled {len(files)} files ({human_size(bundle_size)}) from \"{proj_name}\"", file=sys.stderr)
@@ -2,13 +2,11 @@
 
 
 def merge(a, b):
-    result = a.copy()
-    result.update(b)
-    return result
+    return a | b
 
 
 def invert(d):
-    return {v: k for k, v in d.items()}
+    return dict(zip(d.values(), d.keys()))
 
 
 def filter_by_value(d, predicate):
@@ -3,11 +3,15 @@
 
 def flatten(nested):
     result = []
-    for item in nested:
-        if isinstance(item, list):
-            result.extend(flatten(item))
-        else:
+    stack = [iter(nested)]
+    while stack:
+        for item in stack[-1]:
+            if isinstance(item, list):
+                stack.append(iter(item))
+                break
             result.append(item)
+        else:
+            stack.pop()
     return result
 
 
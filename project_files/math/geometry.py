@@ -2,9 +2,14 @@
 
 import math
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 
 def circle_area(radius):
-    return math.pi * radius ** 2
+    return math.pi * radius * radius
 
 
 def rectangle_area(width, height):
@@ -16,7 +21,27 @@ def triangle_area(base, height):
 
 
 def distance(x1, y1, x2, y2):
-    return math.sqrt((x2 - x1) ** 2 + (y2 - y1) ** 2)
+    return math.hypot(x2 - x1, y2 - y1)
+
+
+def require_numpy():
+    if np is None:
+        raise ImportError("numpy is required for the batched geometry functions")
+
+
+def circle_areas(radii):
+    require_numpy()
+    return np.pi * np.multiply(radii, radii)
+
+
+def triangle_areas(bases, heights):
+    require_numpy()
+    return 0.5 * np.multiply(bases, heights)
+
+
+def distances(x1, y1, x2, y2):
+    require_numpy()
+    return np.hypot(np.subtract(x2, x1), np.subtract(y2, y1))
 
 
 if __name__ == "__main__":
@@ -2,7 +2,7 @@
 
 
 def count_vowels(s):
-    return sum(1 for c in s.lower() if c in "aeiou")
+    return sum(map(s.lower().count, "aeiou"))
 
 
 def count_words(s):
@@ -11,7 +11,8 @@ def count_words(s):
 
 def is_palindrome(s):
     cleaned = s.lower().replace(" ", "")
-    return cleaned == cleaned[::-1]
+    half = len(cleaned) // 2
+    return cleaned[:half] == cleaned[:-half - 1:-1]
 
 
 if __name__ == "__main__":